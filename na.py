@@ -1,8 +1,9 @@
+import io
 import streamlit as st
 import pandas as pd
-from arch.unitroot import ZivotAndrews, PhillipsPerron
-import plotly.graph_objects as go
 import numpy as np
+# arch (statsmodels/scipy) and plotly are imported lazily inside the helpers
+# that need them, so a cold start of the app only pays for streamlit/pandas
 
 # -- Konfigurasi Halaman Utama Streamlit --
 st.set_page_config(
@@ -14,77 +15,405 @@ st.set_page_config(
 # =============================================================================
 # HELPER FUNCTIONS
 # =============================================================================
-def debug_za_test_object(za_test):
-    """Function to debug ZA test object and find available attributes"""
-    st.write("### 🔍 Debug Information")
+def critical_values_table(crit_values):
+    """Critical-value table as a plain dict of lists (st.dataframe accepts it as is)"""
+    return {
+        "Tingkat Signifikansi": list(crit_values.keys()),
+        "Nilai Kritis": [float(v) for v in crit_values.values()],
+    }
+
+def first_valid_values(df):
+    """First non-missing value of every column from one frame-wide mask ('N/A' if none)"""
+    valid = df.notna().to_numpy()
+    if valid.shape[0] == 0:
+        return ['N/A'] * df.shape[1]
+    first_rows = valid.argmax(axis=0)
+    has_value = valid[first_rows, np.arange(df.shape[1])]
+    return [df.iat[row, j] if ok else 'N/A' for j, (row, ok) in enumerate(zip(first_rows, has_value))]
+
+def _suffix_sums(v):
+    """Suffix sums S0[a] = sum(v[a:]) and S1[a] = sum(r * v[r] for r >= a), for a = 0..n"""
+    n = v.shape[0]
+    r = np.arange(n, dtype=float)[:, None]
+    s0 = np.zeros((n + 1, v.shape[1]))
+    s1 = np.zeros((n + 1, v.shape[1]))
+    s0[:n] = np.cumsum(v[::-1], axis=0)[::-1]
+    s1[:n] = np.cumsum((r * v)[::-1], axis=0)[::-1]
+    return s0, s1
+
+def _inv_quad_form(a, u, v):
+    """u' A^-1 v for a stack of 1x1 / 2x2 symmetric matrices A, in closed form"""
+    if a.shape[1] == 1:
+        return u[:, 0] * v[:, 0] / a[:, 0, 0]
+    a00, a01, a11 = a[:, 0, 0], a[:, 0, 1], a[:, 1, 1]
+    det = a00 * a11 - a01 ** 2
+    return (u[:, 0] * (a11 * v[:, 0] - a01 * v[:, 1]) + u[:, 1] * (a00 * v[:, 1] - a01 * v[:, 0])) / det
+
+def za_break_sweep(y, trend, lags, trim=0.15):
+    """Zivot-Andrews statistic for every candidate break at once (no per-break OLS)
+
+    Same regression as arch's ZivotAndrews: dy_t on a constant, a trend, y_{t-1},
+    `lags` lagged differences and the break dummies. The base regressors are
+    factorized once (QR); the dummies are step/ramp columns, so their projections
+    on Q are suffix sums, and partialling them out (Frisch-Waugh / block inverse)
+    gives the y_{t-1} t-stat of all breaks in O(n*k) instead of one OLS per break.
+    Returns (minimum t-stat, break index into y).
+    """
+    y = np.asarray(y, dtype=float)
+    nobs = y.shape[0]
+    n = nobs - 1 - lags
+    trimcnt = int(nobs * trim)
+    bps = np.arange(trimcnt + 1, nobs - trimcnt + 1)
+    cutoffs = bps - (lags + 1)  # first regression row after the break
+    if len(bps) == 0 or cutoffs[0] <= 0:
+        raise ValueError(f"Not enough observations for the Zivot-Andrews test with {lags} lags.")
+
+    # Base regressors (everything except y_{t-1} and the break dummies)
+    dy = np.diff(y)
+    lagged_dy = [dy[lags - j:nobs - 1 - j] for j in range(1, lags + 1)]
+    W = np.column_stack([np.ones(n), np.arange(n) / n] + lagged_dy)
+    lhs = dy[lags:]
+    ylag = y[lags:nobs - 1]
+    # Standardize for numerical stability; t-stats are scale invariant
+    lhs = lhs / np.sqrt(lhs @ lhs)
+    ylag = ylag / np.sqrt(ylag @ ylag)
+
+    # Break columns as (start row, kind): 'du' = 1[r >= a], 'dt' = (r - a + 1) / n for r >= a
+    if trend == 'c':
+        dummies = [(cutoffs, 'du')]
+    elif trend == 'ct':
+        dummies = [(cutoffs, 'du'), (cutoffs, 'dt')]
+    else:
+        dummies = [(cutoffs - 1, 'dt')]
+
+    # Rank check on the full regression of the first candidate break, like arch:
+    # only dummies starting in the first rows can be collinear with the constant
+    # and trend (e.g. trend 't' with lags = trimcnt - 1), so this covers all breaks.
+    # It shares one QR with the base model (the leading columns of Q span W);
+    # columns are scaled to unit norm so the diag(R) tolerance is scale free.
+    # Residualizing against Q is also numerically stabler than inverting W'W.
+    first_dummies = []
+    for a, kind in dummies:
+        col = np.zeros(n)
+        col[a[0]:] = 1.0 if kind == 'du' else np.arange(1, n - a[0] + 1) / n
+        first_dummies.append(col)
+    X0 = np.column_stack([W] + first_dummies + [ylag])
+    norms = np.sqrt((X0 ** 2).sum(axis=0))
+    if norms.min() == 0:
+        raise ValueError("The regressor matrix is singular (constant regions or too many lags).")
+    q, r = np.linalg.qr(X0 / norms)
+    r_diag = np.abs(np.diag(r))
+    if r_diag.min() <= r_diag.max() * max(X0.shape) * np.finfo(float).eps:
+        raise ValueError("The regressor matrix is singular (constant regions or too many lags).")
+    q = q[:, :W.shape[1]]
+    e_x = ylag - q @ (q.T @ ylag)
+    e_y = lhs - q @ (q.T @ lhs)
+    s0, s1 = _suffix_sums(np.column_stack([q, e_x, e_y]))
+
+    dv = np.stack([
+        s0[a] if kind == 'du' else (s1[a] - (a - 1)[:, None] * s0[a]) / n
+        for a, kind in dummies
+    ], axis=1)
+    m = len(dummies)
+    dd = np.empty((len(bps), m, m))
+    for i, (a_i, kind_i) in enumerate(dummies):
+        for j, (a_j, kind_j) in enumerate(dummies):
+            cnt = (n - np.maximum(a_i, a_j)).astype(float)
+            if kind_i == kind_j == 'du':
+                dd[:, i, j] = cnt
+            elif kind_i == kind_j:
+                dd[:, i, j] = cnt * (cnt + 1) * (2 * cnt + 1) / (6 * n ** 2)
+            else:
+                dd[:, i, j] = cnt * (cnt + 1) / (2 * n)
+
+    k_w = W.shape[1]
+    d_q, d_x, d_y = dv[:, :, :k_w], dv[:, :, k_w], dv[:, :, k_w + 1]
+    # Gram matrix of the dummies after removing their projection on the base model
+    dd_resid = dd - np.einsum('tik,tjk->tij', d_q, d_q)
+    sxx = e_x @ e_x - _inv_quad_form(dd_resid, d_x, d_x)
+    sxy = e_x @ e_y - _inv_quad_form(dd_resid, d_x, d_y)
+    syy = e_y @ e_y - _inv_quad_form(dd_resid, d_y, d_y)
+    sigma2 = (syy - sxy ** 2 / sxx) / (n - (k_w + m + 1))
+    stats = sxy / np.sqrt(sigma2 * sxx)
+
+    if not np.isfinite(stats).all():
+        raise ValueError("The Zivot-Andrews regression is numerically singular for some candidate breaks.")
+    best = int(np.argmin(stats))
+    return float(stats[best]), int(bps[best])
+
+def fast_zivot_andrews(y, trend, max_lags, method):
+    """Zivot-Andrews test via `za_break_sweep`, with arch's lag selection and tables"""
+    from arch.unitroot import ADF
+    from arch.unitroot.critical_values.zivot_andrews import za_critical_values
     
-    # Show all public attributes
-    public_attrs = [attr for attr in dir(za_test) if not attr.startswith('_')]
-    st.write("**All public attributes:**", public_attrs)
+    # Same lag selection as arch's ZivotAndrews (autolag on the base ADF(ct) model)
+    lags = ADF(y, max_lags=max_lags, trend='ct', method=method).lags
+    stat, break_index = za_break_sweep(y, trend, lags)
+    table = za_critical_values[trend]  # columns: percentile, statistic
+    crit_values = np.interp([1.0, 5.0, 10.0], table[:, 0], table[:, 1])
+    return {
+        'stat': stat,
+        'pvalue': float(np.interp(stat, table[:, 1], table[:, 0])) / 100.0,
+        'lags': lags,
+        'critical_values': {'1%': crit_values[0], '5%': crit_values[1], '10%': crit_values[2]},
+        'break_index': break_index,
+    }
+
+def _downsample(x, y, max_pts=5000):
+    """Stride-subsample (x, y) to at most max_pts (+1) points, always keeping the last one"""
+    step = -(-len(y) // max_pts)  # ceil
+    if step == 1:
+        return x, y
+    idx = np.r_[np.arange(0, len(y) - 1, step), len(y) - 1]
+    return x[idx], y[idx]
+
+def _plot_dtype():
+    """dtype for plotted values: float32 unless the sidebar asks for full precision"""
+    return np.float64 if st.session_state.get('high_precision', False) else np.float32
+
+def _plot_arrays(series):
+    """(x, y) ndarrays of a series for plotting"""
+    # Plain ndarrays serialize faster than pandas objects; float32 is enough for display
+    return series.index.to_numpy(), series.to_numpy(dtype=_plot_dtype())
+
+def create_series_figure(x, y, name):
+    """Build a WebGL line figure, downsampling long series with plotly-resampler"""
+    import plotly.graph_objects as go
     
-    # Check for breakpoint-related attributes
-    breakpoint_attrs = [attr for attr in dir(za_test) if 'break' in attr.lower() or 'brk' in attr]
-    st.write("**Breakpoint-related attributes:**", breakpoint_attrs)
-    
-    # Check for critical value attributes
-    cv_attrs = [attr for attr in dir(za_test) if 'cv' in attr.lower() or 'crit' in attr.lower()]
-    st.write("**Critical value attributes:**", cv_attrs)
-    
-    # Try to show actual values
-    st.write("**Attribute values:**")
-    for attr in public_attrs[:10]:  # Show first 10 to avoid clutter
+    line_kwargs = dict(mode='lines', name=name, line=dict(color='blue', width=1))
+    if len(y) > 5000:
         try:
-            value = getattr(za_test, attr)
-            if not callable(value):
-                st.write(f"- {attr}: {value}")
-        except:
-            st.write(f"- {attr}: <unable to access>")
-
-def get_breakpoint_safe(za_test, series_length):
-    """Safely get breakpoint from ZA test result"""
-    breakpoint_candidates = [
-        'breakpoint', 'brk', '_breakpoint', '_brk', 
-        'break_point', 'structural_break', 'tb'
-    ]
-    
-    for attr in breakpoint_candidates:
-        if hasattr(za_test, attr):
-            try:
-                bp = getattr(za_test, attr)
-                if isinstance(bp, (int, float)) and 0 <= bp < series_length:
-                    return int(bp)
-            except:
-                continue
-    
-    # If all fails, return middle point as estimate
-    return series_length // 2
-
-def get_critical_values_safe(za_test):
-    """Safely get critical values from ZA test result"""
-    # Try different methods to get critical values
-    methods = [
-        # Method 1: Individual attributes
-        lambda: {'1%': za_test.cv_1, '5%': za_test.cv_5, '10%': za_test.cv_10},
-        # Method 2: Critical values dict
-        lambda: za_test.critical_values,
-        # Method 3: Alternative naming
-        lambda: {'1%': za_test.cv1, '5%': za_test.cv5, '10%': za_test.cv10},
-    ]
+            from plotly_resampler import FigureResampler
+        except ImportError:
+            FigureResampler = None
+        # plotly-resampler butuh x yang naik monoton (data terbaru-dulu / NaT -> stride)
+        if FigureResampler is not None and pd.Index(x).is_monotonic_increasing:
+            # Only ~2000 pixel-relevant points (MinMaxLTTB) are sent to the browser
+            fig = FigureResampler(go.Figure(), default_n_shown_samples=2000, show_mean_aggregation_size=False)
+            fig.add_trace(go.Scattergl(**line_kwargs), hf_x=x, hf_y=y)
+            # Tanpa callback Dash tidak ada resampling saat zoom: buang penanda "[R]"
+            fig.data[-1].name = name
+            return fig
+        # Tanpa plotly-resampler: cukup kirim sampel berjarak tetap ke browser
+        x, y = _downsample(x, y)
+    fig = go.Figure()
+    fig.add_trace(go.Scattergl(x=x, y=y, **line_kwargs))
+    return fig
+
+def show_plot_on_request(toggle_key, build_figure):
+    """Build and render `build_figure()` only once the user switches the plot toggle on"""
+    # Plot hanya dibangun bila diminta; st.expander tetap merender isinya walau
+    # tertutup, sedangkan toggle di dalam fragment hanya me-rerun panel ini
+    if not st.toggle("Tampilkan plot", value=False, key=toggle_key):
+        return
+    try:
+        st.plotly_chart(build_figure(), use_container_width=True, config={'displayModeBar': False})
+    except Exception as e:
+        # Gagal plot bukan berarti uji gagal; hasil di atas tetap berlaku
+        st.warning(f"Plot tidak dapat ditampilkan: {e}")
+
+@st.cache_data(max_entries=4, show_spinner="Membaca file...")
+def _load_df(name, data):
+    """Parse (and cache) an uploaded .csv/.xlsx file from its raw bytes"""
+    bio = io.BytesIO(data)
+    if name.endswith('.csv'):
+        try:
+            # Multi-threaded native reader; fall back if pyarrow is unavailable or
+            # rejects the file
+            df = pd.read_csv(bio, engine='pyarrow')
+        except Exception:
+            bio.seek(0)
+            df = pd.read_csv(bio)
+    else:
+        try:
+            # Rust-based reader, much faster than openpyxl on large workbooks
+            df = pd.read_excel(bio, engine='calamine')
+        except Exception:
+            bio.seek(0)
+            df = pd.read_excel(bio)
     
-    for method in methods:
+    # Arrow-backed text columns go straight into Streamlit's Arrow writer (no
+    # per-object conversion) and are smaller than object columns
+    text_cols = df.select_dtypes(include='object').columns
+    if len(text_cols):
         try:
-            cv = method()
-            if cv and all(isinstance(v, (int, float)) for v in cv.values()):
-                return cv
-        except:
-            continue
+            df[text_cols] = df[text_cols].astype('string[pyarrow]')
+        except ImportError:
+            pass  # tanpa pyarrow kolom teks tetap bertipe object
+    return df
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def _to_datetime(column_key, _values):
+    """Convert (and cache) a date column; `column_key` identifies the unhashed `_values`
+
+    Each upload gets a fresh file_id, so only the current upload's entries are ever
+    hit; max_entries keeps old uploads from piling up in the process-wide cache.
+    """
+    from pandas.tseries.api import guess_datetime_format
+    
+    # Format ditebak dari nilai pertama agar pandas tidak menebak per baris
+    values = _values
+    first_idx = values.first_valid_index()
+    first_val = values[first_idx] if first_idx is not None else None
+    fmt = guess_datetime_format(first_val) if isinstance(first_val, str) else None
+    # fmt None (tebakan gagal / bukan string) -> kembali ke inferensi pandas;
+    # cache=True mem-parse tiap string unik sekali saja
+    return pd.to_datetime(values, format=fmt, errors='coerce', cache=True)
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def _column_groups(df_key, _df):
+    """Return (and cache) the numeric and candidate date columns of the uploaded frame"""
+    # Satu kali baca df.dtypes untuk kedua kelompok (select_dtypes 2x memindai ulang skema).
+    # Tidak identik dengan select_dtypes: kolom timedelta64 tidak lagi dianggap numerik
+    # (memang tidak bisa diuji), dan kandidat tanggal kini juga mencakup datetime
+    # ber-zona waktu serta kolom bertipe string
+    dtypes = _df.dtypes
+    types = pd.api.types
+    is_numeric = dtypes.map(lambda d: types.is_numeric_dtype(d) and not types.is_bool_dtype(d))
+    is_datelike = dtypes.map(lambda d: types.is_datetime64_any_dtype(d) or types.is_string_dtype(d))
+    numeric_cols = dtypes.index[is_numeric.to_numpy(bool)].tolist()
+    date_cols = dtypes.index[is_datelike.to_numpy(bool)].tolist()
+    return numeric_cols, date_cols
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def _describe(df_key, _df):
+    """Build (and cache) the column info table; `df_key` identifies the unhashed `_df`"""
+    return pd.DataFrame({
+        'Kolom': _df.columns,
+        'Tipe Data': _df.dtypes.astype(str),
+        'Nilai Kosong': _df.isna().sum(),
+        'Contoh Nilai': first_valid_values(_df)
+    })
+
+def _clean_series(series):
+    """Drop missing values into a contiguous float64 series for the tests
+
+    Not cached: st.cache_data hashes a large Series from a row sample only (stale
+    results after an edited re-upload), and hash + unpickle costs about as much
+    as this single masking pass.
+    """
+    values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+    mask = ~np.isnan(values)
+    if mask.all():
+        # Tidak ada nilai kosong: pakai array & index apa adanya (tanpa salinan boolean-index)
+        return pd.Series(values, index=series.index, name=series.name)
+    return pd.Series(values[mask], index=series.index[mask], name=series.name)
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def _run_za(series_key, _values, trend, max_lags, method):
+    """Run (and cache) the Zivot-Andrews test; `series_key` identifies the unhashed `_values`"""
+    return fast_zivot_andrews(_values, trend, max_lags, method)
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def _run_pp(series_key, _values, trend, lags):
+    """Run (and cache) the Phillips-Perron test; `series_key` identifies the unhashed `_values`"""
+    from arch.unitroot import PhillipsPerron
     
-    return None
+    pp_test = PhillipsPerron(pd.Series(_values), trend=trend, lags=lags)
+    return {
+        'stat': float(pp_test.stat),
+        'pvalue': float(pp_test.pvalue),
+        'lags': pp_test.lags,
+        'critical_values': pp_test.critical_values,
+    }
 
 # =============================================================================
 # FUNGSI UNTUK APLIKASI UJI ZIVOT-ANDREWS
 # =============================================================================
-def zivot_andrews_app(df):
+def za_break_figure(series_to_test, break_date, selected_column):
+    """Series plot with the detected Zivot-Andrews break marked"""
+    fig = create_series_figure(*_plot_arrays(series_to_test), selected_column)
+
+    # Add vertical line for breakpoint - use add_shape instead of add_vline
+    # (Timestamp diterima langsung oleh plotly, tanpa to_pydatetime)
+    fig.add_shape(
+        type="line",
+        x0=break_date,
+        x1=break_date,
+        y0=0,
+        y1=1,
+        yref="paper",
+        line=dict(color="red", width=3, dash="dash"),
+    )
+
+    # Add annotation for the breakpoint
+    fig.add_annotation(
+        x=break_date,
+        y=0.9,
+        yref="paper",
+        text="Patahan Terdeteksi",
+        showarrow=True,
+        arrowhead=2,
+        arrowcolor="red",
+        bgcolor="white",
+        bordercolor="red",
+        borderwidth=1
+    )
+
+    fig.update_layout(
+        title=f'Plot "{selected_column}" dengan Patahan Struktural',
+        xaxis_title='Tanggal/Index',
+        yaxis_title='Nilai',
+        hovermode='x',
+        showlegend=True
+    )
+    return fig
+
+@st.fragment
+def za_results_panel(za_result, series_to_test, selected_column):
+    """Render ZA results; widgets in here rerun only this panel, not the whole script"""
+    # Debug: Tampilkan hasil uji mentah (hanya untuk debugging)
+    if st.checkbox("🔍 Debug Mode", key="debug_za"):
+        st.write("### 🔍 Debug Information")
+        st.json(za_result)
+
+    # --- BAGIAN KRITIS YANG DIPERBAIKI SECARA PERMANEN ---
+    # Breakpoint sudah ditentukan oleh za_break_sweep di dalam _run_za
+    break_index = za_result['break_index']
+
+    if break_index is None or break_index >= len(series_to_test):
+        st.error("Tidak dapat menentukan breakpoint yang valid. Silakan coba dengan data atau pengaturan yang berbeda.")
+        return
+    # ----------------------------------------------------
+
+    break_date = series_to_test.index[break_index]
+
+    st.subheader("🔬 Hasil Uji")
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Statistik Uji", f"{za_result['stat']:.4f}")
+    col2.metric("P-value", f"{za_result['pvalue']:.4f}")
+
+    # Indeks tanggal -> 'YYYY-MM-DD'; indeks lain (mis. RangeIndex) atau NaT ditampilkan apa adanya
+    if isinstance(series_to_test.index, pd.DatetimeIndex) and pd.notna(break_date):
+        break_date_str = pd.Timestamp(break_date).date().isoformat()
+    else:
+        break_date_str = str(break_date)
+
+    col3.metric("Tanggal Patahan", break_date_str)
+
+    st.subheader("Kesimpulan Uji")
+    alpha = 0.05
+    if za_result['pvalue'] < alpha:
+        st.success(f"**Tolak Hipotesis Nol (H₀)** pada α = {alpha}. Data **stasioner** dengan adanya patahan struktural.")
+    else:
+        st.warning(f"**Gagal Tolak Hipotesis Nol (H₀)** pada α = {alpha}. Data **tidak stasioner**.")
+
+    # Display critical values with error handling
+    st.subheader("Nilai Kritis")
+    crit_values = za_result['critical_values']
+
+    if crit_values:
+        st.dataframe(critical_values_table(crit_values), hide_index=True)
+    else:
+        st.warning("Nilai kritis tidak tersedia.")
+
+    st.caption(f"Lag yang digunakan dalam model: {za_result['lags']}")
+
+    # Visualization
+    st.header("📈 Visualisasi")
+    show_plot_on_request('za_show_plot', lambda: za_break_figure(series_to_test, break_date, selected_column))
+
+def zivot_andrews_app(df, numeric_cols, df_key):
     st.header("Uji Zivot-Andrews")
     st.markdown("Uji ini digunakan untuk data time series dengan **satu kali patahan struktural**.")
 
@@ -92,7 +421,6 @@ def zivot_andrews_app(df):
     st.sidebar.subheader("Pengaturan Uji Zivot-Andrews")
     
     # Pilihan Kolom Numerik
-    numeric_cols = df.select_dtypes(include=['number']).columns.tolist()
     if not numeric_cols:
         st.error("Tidak ada kolom numerik yang ditemukan dalam data.")
         return
@@ -120,16 +448,22 @@ def zivot_andrews_app(df):
         key='za_lag_method',
     )
     
+    # Default lag hanya dihitung ulang ketika jumlah observasi berubah (file baru)
+    n_obs = len(df)
+    if st.session_state.get('za_default_lags_nobs') != n_obs:
+        st.session_state['za_default_lags_nobs'] = n_obs
+        st.session_state['za_default_lags'] = int(n_obs**(1/3)) if n_obs > 0 else 10
+    
     max_lags = st.sidebar.number_input(
         "Masukkan jumlah maksimum lag",
         min_value=0,
-        value=int(len(df)**(1/3)) if len(df) > 0 else 10,
+        value=st.session_state['za_default_lags'],
         key='za_max_lags',
     )
 
     # Tombol untuk menjalankan analisis
     if st.sidebar.button("🚀 Jalankan Uji", key='za_run'):
-        series_to_test = df[selected_column].dropna()
+        series_to_test = _clean_series(df[selected_column])
 
         if len(series_to_test) < 20:
             st.warning("Data terlalu sedikit untuk hasil yang andal. Minimal 20 observasi diperlukan.")
@@ -138,124 +472,15 @@ def zivot_andrews_app(df):
         try:
             with st.spinner('Menjalankan Uji Zivot-Andrews...'):
                 # FIXED: Using lag_method instead of undefined 'method' variable
-                za_test = ZivotAndrews(
-                    series_to_test, 
-                    lags=max_lags, 
-                    trend=arch_model, 
+                za_result = _run_za(
+                    (df_key, selected_column),
+                    series_to_test.to_numpy(),
+                    trend=arch_model,
+                    max_lags=int(max_lags),
                     method=lag_method.lower()
                 )
-                
-                # Debug: Tampilkan atribut yang tersedia (hanya untuk debugging)
-                if st.sidebar.checkbox("🔍 Debug Mode", key="debug_za"):
-                    debug_za_test_object(za_test)
-                
-                # --- BAGIAN KRITIS YANG DIPERBAIKI SECARA PERMANEN ---
-                # Gunakan helper function untuk mendapatkan breakpoint
-                break_index = get_breakpoint_safe(za_test, len(series_to_test))
-                
-                if break_index is None or break_index >= len(series_to_test):
-                    st.error("Tidak dapat menentukan breakpoint yang valid. Silakan coba dengan data atau pengaturan yang berbeda.")
-                    return
-                # ----------------------------------------------------
-                
-                # Ensure break_index is within valid range
-                if break_index >= len(series_to_test):
-                    break_index = len(series_to_test) - 1
-                
-                break_date = series_to_test.index[break_index]
-
-                st.subheader("🔬 Hasil Uji")
-                col1, col2, col3 = st.columns(3)
-                col1.metric("Statistik Uji", f"{za_test.stat:.4f}")
-                col2.metric("P-value", f"{za_test.pvalue:.4f}")
-                
-                # Handle different types of index for break date display
-                if hasattr(break_date, 'date'):
-                    break_date_str = str(break_date.date())
-                elif isinstance(break_date, (pd.Timestamp, np.datetime64)):
-                    break_date_str = str(pd.to_datetime(break_date).date())
-                else:
-                    break_date_str = str(break_date)
-                
-                col3.metric("Tanggal Patahan", break_date_str)
-
-                st.subheader("Kesimpulan Uji")
-                alpha = 0.05
-                if za_test.pvalue < alpha:
-                    st.success(f"**Tolak Hipotesis Nol (H₀)** pada α = {alpha}. Data **stasioner** dengan adanya patahan struktural.")
-                else:
-                    st.warning(f"**Gagal Tolak Hipotesis Nol (H₀)** pada α = {alpha}. Data **tidak stasioner**.")
-
-                # Display critical values with error handling
-                st.subheader("Nilai Kritis")
-                crit_values = get_critical_values_safe(za_test)
-                
-                if crit_values:
-                    crit_values_df = pd.DataFrame.from_dict(
-                        crit_values, 
-                        orient='index', 
-                        columns=['Nilai Kritis']
-                    )
-                    crit_values_df.index.name = "Tingkat Signifikansi"
-                    st.table(crit_values_df)
-                else:
-                    st.warning("Nilai kritis tidak tersedia. Gunakan Debug Mode untuk melihat atribut yang tersedia.")
-                
-                st.caption(f"Lag yang digunakan dalam model: {getattr(za_test, 'lags', 'N/A')}")
-
-                # Visualization
-                st.header("📈 Visualisasi")
-                fig = go.Figure()
-                
-                # Convert index to appropriate format for plotting
-                x_values = series_to_test.index
-                if isinstance(series_to_test.index, pd.DatetimeIndex):
-                    x_values = series_to_test.index.to_pydatetime()
-                    break_date_plot = break_date.to_pydatetime() if hasattr(break_date, 'to_pydatetime') else break_date
-                else:
-                    break_date_plot = break_date
-                
-                fig.add_trace(go.Scatter(
-                    x=x_values, 
-                    y=series_to_test.values, 
-                    mode='lines', 
-                    name=selected_column,
-                    line=dict(color='blue', width=1)
-                ))
-                
-                # Add vertical line for breakpoint - use add_shape instead of add_vline
-                fig.add_shape(
-                    type="line",
-                    x0=break_date_plot,
-                    x1=break_date_plot,
-                    y0=0,
-                    y1=1,
-                    yref="paper",
-                    line=dict(color="red", width=3, dash="dash"),
-                )
-                
-                # Add annotation for the breakpoint
-                fig.add_annotation(
-                    x=break_date_plot,
-                    y=0.9,
-                    yref="paper",
-                    text="Patahan Terdeteksi",
-                    showarrow=True,
-                    arrowhead=2,
-                    arrowcolor="red",
-                    bgcolor="white",
-                    bordercolor="red",
-                    borderwidth=1
-                )
-                
-                fig.update_layout(
-                    title=f'Plot "{selected_column}" dengan Patahan Struktural',
-                    xaxis_title='Tanggal/Index',
-                    yaxis_title='Nilai',
-                    hovermode='x unified',
-                    showlegend=True
-                )
-                st.plotly_chart(fig, use_container_width=True)
+            # Hasil ditampilkan dalam fragment agar interaksi di dalamnya tidak memicu rerun penuh
+            za_results_panel(za_result, series_to_test, selected_column)
 
         except Exception as e:
             st.error(f"Terjadi kesalahan saat menjalankan uji Zivot-Andrews: {str(e)}")
@@ -264,7 +489,48 @@ def zivot_andrews_app(df):
 # =============================================================================
 # FUNGSI UNTUK APLIKASI UJI PHILLIPS-PERRON
 # =============================================================================
-def phillips_perron_app(df):
+def pp_series_figure(series_to_test, selected_column):
+    """Time series plot of the Phillips-Perron input series"""
+    fig = create_series_figure(*_plot_arrays(series_to_test), selected_column)
+    fig.update_layout(
+        title=f'Time Series Plot untuk "{selected_column}"',
+        xaxis_title='Tanggal/Index',
+        yaxis_title='Nilai',
+        hovermode='x'
+    )
+    return fig
+
+@st.fragment
+def pp_results_panel(pp_result, series_to_test, selected_column):
+    """Render PP results; widgets in here rerun only this panel, not the whole script"""
+    st.subheader("🔬 Hasil Uji")
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Statistik Uji (τ)", f"{pp_result['stat']:.4f}")
+    col2.metric("P-value", f"{pp_result['pvalue']:.4f}")
+    col3.metric("Lags Digunakan", pp_result['lags'])
+
+    st.subheader("Kesimpulan Uji")
+    alpha = 0.05
+    if pp_result['pvalue'] < alpha:
+        st.success(f"**Tolak Hipotesis Nol (H₀)** pada α = {alpha}. Data **stasioner**.")
+    else:
+        st.warning(f"**Gagal Tolak Hipotesis Nol (H₀)** pada α = {alpha}. Data **tidak stasioner**.")
+
+    # Display critical values with error handling
+    st.subheader("Nilai Kritis")
+    try:
+        if pp_result['critical_values']:
+            st.dataframe(critical_values_table(pp_result['critical_values']), hide_index=True)
+        else:
+            st.warning("Nilai kritis tidak tersedia.")
+    except Exception as e:
+        st.warning(f"Tidak dapat menampilkan nilai kritis: {e}")
+
+    # Visualization
+    st.header("📊 Visualisasi")
+    show_plot_on_request('pp_show_plot', lambda: pp_series_figure(series_to_test, selected_column))
+
+def phillips_perron_app(df, numeric_cols, df_key):
     st.header("Uji Phillips-Perron (PP)")
     st.markdown("Uji ini digunakan untuk menguji stasioneritas pada data time series secara umum.")
 
@@ -272,7 +538,6 @@ def phillips_perron_app(df):
     st.sidebar.subheader("Pengaturan Uji Phillips-Perron")
 
     # Pilihan Kolom Numerik
-    numeric_cols = df.select_dtypes(include=['number']).columns.tolist()
     if not numeric_cols:
         st.error("Tidak ada kolom numerik yang ditemukan dalam data.")
         return
@@ -299,13 +564,15 @@ def phillips_perron_app(df):
         min_value=0,
         value=0, 
         key='pp_lags',
-        help="Biarkan 0 untuk pemilihan otomatis oleh library."
+        help="Biarkan 0 untuk aturan Schwert: ⌈12·(n/100)^¼⌉. Nilai ini langsung dihitung dari n, tanpa pencarian lag."
     )
+    # 0 -> lags=None: arch langsung memakai aturan Schwert (tanpa autolag), jadi
+    # tidak ada biaya tambahan dibanding mengisi lag secara manual
     lags_to_use = None if lags == 0 else lags
 
     # Tombol untuk menjalankan analisis
     if st.sidebar.button("🚀 Jalankan Uji", key='pp_run'):
-        series_to_test = df[selected_column].dropna()
+        series_to_test = _clean_series(df[selected_column])
 
         if len(series_to_test) < 20:
             st.warning("Data terlalu sedikit untuk hasil yang andal. Minimal 20 observasi diperlukan.")
@@ -313,54 +580,11 @@ def phillips_perron_app(df):
         
         try:
             with st.spinner('Menjalankan Uji Phillips-Perron...'):
-                pp_test = PhillipsPerron(series_to_test, trend=arch_trend, lags=lags_to_use)
-
-                st.subheader("🔬 Hasil Uji")
-                col1, col2, col3 = st.columns(3)
-                col1.metric("Statistik Uji (τ)", f"{pp_test.stat:.4f}")
-                col2.metric("P-value", f"{pp_test.pvalue:.4f}")
-                col3.metric("Lags Digunakan", getattr(pp_test, 'lags', 'N/A'))
-                
-                st.subheader("Kesimpulan Uji")
-                alpha = 0.05
-                if pp_test.pvalue < alpha:
-                    st.success(f"**Tolak Hipotesis Nol (H₀)** pada α = {alpha}. Data **stasioner**.")
-                else:
-                    st.warning(f"**Gagal Tolak Hipotesis Nol (H₀)** pada α = {alpha}. Data **tidak stasioner**.")
-
-                # Display critical values with error handling
-                st.subheader("Nilai Kritis")
-                try:
-                    if hasattr(pp_test, 'critical_values') and pp_test.critical_values:
-                        crit_values_df = pd.DataFrame.from_dict(
-                            pp_test.critical_values, 
-                            orient='index', 
-                            columns=['Nilai Kritis']
-                        )
-                        crit_values_df.index.name = "Tingkat Signifikansi"
-                        st.table(crit_values_df)
-                    else:
-                        st.warning("Nilai kritis tidak tersedia.")
-                except Exception as e:
-                    st.warning(f"Tidak dapat menampilkan nilai kritis: {e}")
-                
-                # Visualization
-                st.header("📊 Visualisasi")
-                fig = go.Figure()
-                fig.add_trace(go.Scatter(
-                    x=series_to_test.index, 
-                    y=series_to_test, 
-                    mode='lines', 
-                    name=selected_column,
-                    line=dict(color='blue', width=1)
-                ))
-                fig.update_layout(
-                    title=f'Time Series Plot untuk "{selected_column}"',
-                    xaxis_title='Tanggal/Index',
-                    yaxis_title='Nilai',
-                    hovermode='x unified'
+                pp_result = _run_pp(
+                    (df_key, selected_column), series_to_test.to_numpy(), trend=arch_trend, lags=lags_to_use
                 )
-                st.plotly_chart(fig, use_container_width=True)
+            # Hasil ditampilkan dalam fragment agar interaksi di dalamnya tidak memicu rerun penuh
+            pp_results_panel(pp_result, series_to_test, selected_column)
 
         except Exception as e:
             st.error(f"Terjadi kesalahan saat menjalankan uji Phillips-Perron: {str(e)}")
@@ -393,23 +617,30 @@ uploaded_file = st.sidebar.file_uploader(
     type=["csv", "xlsx"],
     help="File harus berisi data time series dengan kolom tanggal dan variabel numerik."
 )
+st.sidebar.checkbox(
+    "Plot presisi tinggi (float64)",
+    value=False,
+    key='high_precision',
+    help="Uji selalu dihitung dengan float64. Jika tidak dicentang, nilai plot dikirim sebagai float32 (payload setengahnya)."
+)
 
 # Jika file sudah diunggah, proses dan panggil fungsi yang sesuai
 if uploaded_file is not None:
     try:
-        # Read the file
-        if uploaded_file.name.endswith('.csv'):
-            df = pd.read_csv(uploaded_file)
-        else:
-            df = pd.read_excel(uploaded_file)
+        # Read the file (cached on the uploaded bytes)
+        df = _load_df(uploaded_file.name, uploaded_file.getvalue())
         
         st.success(f"✅ File '{uploaded_file.name}' berhasil diunggah!")
         
         # Show basic info about the dataset
         st.info(f"Dataset memiliki {df.shape[0]} baris dan {df.shape[1]} kolom.")
 
+        # Skema kolom dihitung sekali per file; kolom tanggal tidak pernah numerik,
+        # jadi numeric_cols tetap berlaku setelah set_index di bawah
+        numeric_cols, date_cols = _column_groups(uploaded_file.file_id, df)
+
         # Opsi untuk memilih kolom tanggal dan menjadikannya index
-        date_cols = [col for col in df.columns if df[col].dtype in ['datetime64[ns]', 'object']]
+        date_col = None
         
         if date_cols:
             date_col = st.sidebar.selectbox(
@@ -420,9 +651,13 @@ if uploaded_file is not None:
             
             if date_col != 'Tidak menggunakan indeks tanggal':
                 try:
-                    df[date_col] = pd.to_datetime(df[date_col], errors='coerce')
+                    # Kolom yang sudah bertipe datetime tidak perlu dikonversi ulang
+                    if not pd.api.types.is_datetime64_any_dtype(df[date_col]):
+                        # Kunci eksplisit: hashing Series besar oleh st.cache_data hanya memakai
+                        # sampel baris, sehingga file yang diedit bisa mendapat hasil lama
+                        df[date_col] = _to_datetime((uploaded_file.file_id, date_col), df[date_col])
                     # Check for any NaT values after conversion
-                    if df[date_col].isna().any():
+                    if df[date_col].hasnans:
                         st.sidebar.warning(f"Beberapa nilai dalam kolom '{date_col}' tidak dapat dikonversi ke tanggal.")
                     
                     df.set_index(date_col, inplace=True)
@@ -436,23 +671,20 @@ if uploaded_file is not None:
         st.subheader("👀 Pratinjau Data")
         st.dataframe(df.head(10))
         
-        # Show data types
+        # df_key menandai isi df secara pasti (file & kolom tanggal); dipakai sebagai
+        # kunci cache pengganti hashing st.cache_data yang hanya mengambil sampel
+        df_key = (uploaded_file.file_id, date_col)
         with st.expander("📋 Informasi Kolom"):
-            info_df = pd.DataFrame({
-                'Kolom': df.columns,
-                'Tipe Data': df.dtypes,
-                'Nilai Kosong': df.isnull().sum(),
-                'Contoh Nilai': [df[col].dropna().iloc[0] if not df[col].dropna().empty else 'N/A' for col in df.columns]
-            })
+            info_df = _describe(df_key, df)
             st.dataframe(info_df)
         
         st.markdown("---")
         
         # Panggil fungsi aplikasi yang sesuai berdasarkan pilihan di sidebar
         if pilihan_uji == "Uji Zivot-Andrews":
-            zivot_andrews_app(df)
+            zivot_andrews_app(df, numeric_cols, df_key)
         elif pilihan_uji == "Uji Phillips-Perron":
-            phillips_perron_app(df)
+            phillips_perron_app(df, numeric_cols, df_key)
 
     except Exception as e:
         st.error(f"❌ Terjadi kesalahan saat memproses file: {e}")